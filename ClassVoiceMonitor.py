@@ -1,19 +1,824 @@
+import time
+
+_STARTUP_T0 = time.perf_counter()  # 启动计时起点，须在其余导入之前
+
 import json
-import logging
+import re
 import sys
-import numpy as np
-import pyaudio
 import os
 import datetime
+import threading
+import queue
+import struct
+from contextlib import contextmanager
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout,
                              QWidget, QLabel, QProgressBar,
                              QSlider, QStatusBar, QPushButton, QDialog,
-                             QTextEdit, QHBoxLayout, QMessageBox)
-from PyQt5.QtCore import QTimer, Qt
+                             QTextEdit, QHBoxLayout, QMessageBox, QTabWidget,
+                             QFileDialog)
+from PyQt5.QtCore import QTimer, Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QPainter, QLinearGradient, QColor, QPen, QPainterPath
 from loguru import logger
 import traceback
 
+# numpy 与 pyaudio 较重，在后台预热线程或首次使用时再导入
+_STARTUP_IMPORTED = time.perf_counter()
+
+
+class StartupProfiler:
+    """启动耗时分析（--profile-startup）"""
+
+    def __init__(self, enabled=False, t0=None):
+        self.enabled = enabled
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.phases = []
+        self.lock = threading.Lock()
+
+    def record(self, name, start, end):
+        """记录一个阶段的起止时间"""
+        with self.lock:
+            self.phases.append((name, start, end))
+
+    @contextmanager
+    def phase(self, name):
+        """计时上下文，用于包裹一个启动阶段"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def report(self):
+        """生成各阶段耗时报告"""
+        with self.lock:
+            phases = sorted(self.phases, key=lambda p: p[1])
+        lines = ["启动耗时分析", '=' * 25]
+        for name, start, end in phases:
+            lines.append(f"    {name:<16} {(end - start) * 1000:8.1f} ms  (起于 +{(start - self.t0) * 1000:.1f} ms)")
+        if phases:
+            total = max(end for _, _, end in phases) - self.t0
+            lines.append(f"    {'总计':<16} {total * 1000:8.1f} ms")
+        lines.append('=' * 25)
+        return "\n".join(lines)
+
+
+class LevelHistory:
+    """逐秒音量记录，使用预分配的 uint8 数组存储"""
+
+    GAP = 255  # 设备中断、没有采集到数据的秒
+
+    def __init__(self, capacity=3600):
+        import numpy as np
+
+        self.data = np.zeros(max(1, capacity), dtype=np.uint8)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, level):
+        """追加一个 0-100 的音量级别，容量不足时翻倍扩容"""
+        if self.size == len(self.data):
+            import numpy as np
+
+            grown = np.zeros(len(self.data) * 2, dtype=np.uint8)
+            grown[:self.size] = self.data
+            self.data = grown
+        self.data[self.size] = max(0, min(100, int(level)))
+        self.size += 1
+
+    def append_gap(self):
+        """追加一秒中断标记"""
+        self.append(0)
+        self.data[self.size - 1] = self.GAP
+
+    def gap_seconds(self):
+        """中断的总秒数"""
+        return int((self.values() == self.GAP).sum())
+
+    def values(self):
+        """返回已记录部分（视图，不复制）"""
+        return self.data[:self.size]
+
+    def clear(self):
+        """清空记录但保留已分配的缓冲区"""
+        self.size = 0
+
+
+class RatingRules:
+    """表驱动的评级规则，可在 config.json 的 rating_rules 中自定义"""
+
+    DEFAULT = {
+        'tiers': [
+            {'name': 'CRITICAL PERFECT!', 'label': 'Critical Perfect', 'min_level': 96, 'points': 100,
+             'combo': True, 'style': 'color: #ffe800; font-weight: bold;'},
+            {'name': 'Perfect!', 'label': 'Perfect', 'min_level': 86, 'points': 80,
+             'combo': True, 'style': 'color: #ffa300; font-weight: bold;'},
+            {'name': 'Great!', 'label': 'Great', 'min_level': 70, 'points': 50,
+             'combo': True, 'style': 'color: #ea1ac1; font-weight: bold;'},
+            {'name': 'Good', 'label': 'Good', 'min_level': 50, 'points': 20,
+             'combo': False, 'style': 'color: #5eff00;'},
+            {'name': 'Miss', 'label': 'Miss', 'min_level': 0, 'points': -20,
+             'combo': False, 'style': 'color: #95a5a6;'},
+        ],
+        'combo_threshold': 5,  # 连续多少次可连击评级后开始计为 Combo
+        'combo_bonus_step': 0.1,  # 每多一次连击，奖励增加的得分倍数
+        'combo_bonus_cap': None,  # 奖励倍数上限，None 为不限
+    }
+
+    # 旧版 records/raw/<ts>.json 使用的扁平字段前缀，默认档位继续写出以保持兼容
+    LEGACY_KEYS = {
+        'CRITICAL PERFECT!': 'critical_perfect',
+        'Perfect!': 'perfect',
+        'Great!': 'great',
+        'Good': 'good',
+        'Miss': 'miss',
+    }
+
+    def __init__(self, tiers, combo_threshold=5, combo_bonus_step=0.1, combo_bonus_cap=None):
+        try:
+            self.tiers = sorted(({'name': str(t['name']),
+                                  'label': str(t.get('label', t['name'])),
+                                  'min_level': max(0, min(100, int(t['min_level']))),
+                                  'points': int(t['points']),
+                                  'combo': bool(t.get('combo', False)),
+                                  'style': str(t.get('style', ''))} for t in tiers),
+                                key=lambda t: t['min_level'], reverse=True)
+            self.combo_threshold = max(1, int(combo_threshold))
+            self.combo_bonus_step = float(combo_bonus_step)
+            self.combo_bonus_cap = None if combo_bonus_cap is None else float(combo_bonus_cap)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"评级规则配置无效: {str(e)}")
+        if not self.tiers or self.tiers[-1]['min_level'] != 0:
+            raise ValueError("评级规则配置无效: 最低一档的 min_level 必须为 0")
+        min_levels = [t['min_level'] for t in self.tiers]
+        if len(set(min_levels)) != len(min_levels):
+            raise ValueError("评级规则配置无效: 各档的 min_level 不能重复")
+
+        # 预计算 0-100 级别到档位下标的查找表，评级时无需逐档比较
+        # 使用普通列表，避免在界面显示前导入 numpy；重算时再转换为数组
+        self.level_table = [0] * 101
+        for index in reversed(range(len(self.tiers))):
+            for level in range(self.tiers[index]['min_level'], 101):
+                self.level_table[level] = index
+        self._arrays = None
+
+    def arrays(self):
+        """向量化计算用的查找表：(级别→档位, 档位→得分, 档位→可连击)"""
+        if self._arrays is None:
+            import numpy as np
+
+            self._arrays = (np.array(self.level_table, dtype=np.int64),
+                            np.array([t['points'] for t in self.tiers], dtype=np.int64),
+                            np.array([t['combo'] for t in self.tiers], dtype=bool))
+        return self._arrays
+
+    @classmethod
+    def from_config(cls, config):
+        """由配置字典创建规则，缺省项使用默认值"""
+        if config is not None and not isinstance(config, dict):
+            raise ValueError("评级规则配置无效: rating_rules 应为对象")
+        merged = dict(cls.DEFAULT)
+        merged.update(config or {})
+        return cls(merged['tiers'], merged['combo_threshold'],
+                   merged['combo_bonus_step'], merged['combo_bonus_cap'])
+
+    def to_config(self):
+        """导出为可写入 config.json 的字典"""
+        return {
+            'tiers': [dict(t) for t in self.tiers],
+            'combo_threshold': self.combo_threshold,
+            'combo_bonus_step': self.combo_bonus_step,
+            'combo_bonus_cap': self.combo_bonus_cap,
+        }
+
+    def tier_index(self, level):
+        """查表得到级别对应的档位下标"""
+        return self.level_table[max(0, min(100, int(level)))]
+
+    def combo_multiplier(self, combo_count):
+        """连击奖励倍数（支持数组）"""
+        import numpy as np
+
+        multiplier = np.maximum(np.asarray(combo_count) - self.combo_threshold + 1, 0) * self.combo_bonus_step
+        if self.combo_bonus_cap is not None:
+            multiplier = np.minimum(multiplier, self.combo_bonus_cap)
+        return multiplier
+
+    def combo_bonus(self, points, combo_count):
+        """单次评级的连击奖励"""
+        if combo_count < self.combo_threshold:
+            return 0
+        multiplier = (combo_count - self.combo_threshold + 1) * self.combo_bonus_step
+        if self.combo_bonus_cap is not None:
+            multiplier = min(multiplier, self.combo_bonus_cap)
+        return int(points * multiplier)
+
+    def condition_text(self, index):
+        """档位条件说明，如 (>=96) 或 (<50)"""
+        min_level = self.tiers[index]['min_level']
+        if min_level > 0 or index == 0:
+            return f"(>={min_level})"
+        return f"(<{self.tiers[index - 1]['min_level']})"
+
+    def rescore(self, levels):
+        """用当前规则对逐秒音量记录一次性向量化重算，中断（>100）的秒不计分也不打断连击"""
+        import numpy as np
+
+        all_levels = np.asarray(levels, dtype=np.int64)
+        valid = (all_levels >= 0) & (all_levels <= 100)
+        levels = all_levels[valid]
+        level_table, points_table, combo_table = self.arrays()
+        tiers = level_table[levels]
+        points = points_table[tiers]
+        comboable = combo_table[tiers]
+
+        # 连击计数：当前位置减去最近一次中断的位置
+        positions = np.arange(len(levels))
+        last_break = np.maximum.accumulate(np.where(comboable, -1, positions)) if len(levels) else positions
+        combo_counts = np.where(comboable, positions - last_break, 0)
+
+        bonus = np.where(combo_counts >= self.combo_threshold,
+                         np.trunc(points * self.combo_multiplier(combo_counts)), 0).astype(np.int64)
+
+        # 连击在下一秒中断或记录结束时计入历史
+        run_ends = comboable & np.append(~comboable[1:], True)
+        combo_history = combo_counts[run_ends]
+        combo_history = combo_history[combo_history >= self.combo_threshold]
+        all_combo_counts = np.zeros(len(all_levels), dtype=np.int64)
+        all_combo_counts[valid] = combo_counts
+
+        return {
+            'score': int(points.sum()),
+            'combo_bonus': int(bonus.sum()),
+            'tier_counts': np.bincount(tiers, minlength=len(self.tiers)).tolist(),
+            'combo_history': combo_history.tolist(),
+            'combo_counts': all_combo_counts,
+            'gap_seconds': int((~valid).sum()),
+        }
+
+    def report_data(self, start_time, end_time, duration, score, tier_counts, combo_history, gap_seconds=0):
+        """生成报告数据"""
+        avg_score_rate = score / duration if duration > 0 else 0
+        total_ratings = sum(tier_counts)
+
+        ratings = []
+        for index, tier in enumerate(self.tiers):
+            count = tier_counts[index]
+            ratings.append({
+                'name': tier['name'],
+                'label': tier['label'],
+                'condition': self.condition_text(index),
+                'count': count,
+                'percent': (count / total_ratings * 100) if total_ratings > 0 else 0,
+            })
+
+        report_data = {
+            'start_time': start_time,
+            'end_time': end_time,
+            'duration': int(duration),
+            'gap_seconds': gap_seconds,
+            'total_score': score,
+            'avg_score_rate': avg_score_rate,
+            'total_combos': sum(combo_history),
+            'max_combo': max(combo_history) if combo_history else 0,
+            'avg_combo_duration': sum(combo_history) / len(combo_history) if combo_history else 0,
+            'ratings': ratings,
+        }
+        for rating in ratings:
+            prefix = self.LEGACY_KEYS.get(rating['name'])
+            if prefix is not None:
+                report_data[f'{prefix}_count'] = rating['count']
+                report_data[f'{prefix}_percent'] = rating['percent']
+        return report_data
+
+
+class RateLimitedLogger:
+    """限频日志：同一类消息在 interval 秒内只输出一次，并汇总期间被省略的条数"""
+
+    def __init__(self, interval=10.0, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.state = {}  # key -> (上次输出时间, 省略条数)
+        self.lock = threading.Lock()
+
+    def log(self, key, message, level='ERROR'):
+        """输出或省略一条消息，返回是否实际输出"""
+        now = self.clock()
+        with self.lock:
+            last, suppressed = self.state.get(key, (None, 0))
+            if last is not None and now - last < self.interval:
+                self.state[key] = (last, suppressed + 1)
+                return False
+            self.state[key] = (now, 0)
+        if suppressed:
+            message += f"（此前 {self.interval:.0f} 秒内另有 {suppressed} 条同类消息已省略）"
+        logger.log(level, message)
+        return True
+
+
+class AudioSupervisor:
+    """音频流守护：检测流失效，在后台按指数退避重新打开，期间采集线程不阻塞
+
+    open_stream(reconnect) 返回一个带 read/is_active/stop_stream/close 的音频流，
+    reconnect 为 True 时表示需要重新初始化设备。可传入会按需抛出异常的假音频流进行测试。
+    """
+
+    def __init__(self, open_stream, initial_backoff=0.5, max_backoff=30.0, healthy_after=10.0,
+                 clock=time.monotonic, error_log=None):
+        self.open_stream = open_stream
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.healthy_after = healthy_after  # 音频流持续正常多少秒后重置退避时间
+        self.clock = clock
+        self.error_log = error_log or RateLimitedLogger()
+
+        self.stream = None
+        self.failed_stream = None  # 待重连线程关闭的失效音频流
+        self.reconnect_thread = None
+        self.reconnecting = False  # 重连线程是否仍负责恢复音频流，受 lock 保护
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.backoff = initial_backoff
+        self.connected_at = None
+        self.gap_started = None
+        self.generation = 0  # 每次成功打开音频流加一，用于让存档在重连后另起一段
+
+    @property
+    def connected(self):
+        return self.stream is not None
+
+    def start(self):
+        """首次打开音频流，失败时转入后台重连，返回是否已连接"""
+        self.stop_event.clear()
+        try:
+            stream = self.open_stream(False)
+        except Exception as e:
+            with self.lock:
+                self.gap_started = self.clock()
+            self.error_log.log('stream_failure', f"音频设备打开失败，开始尝试重连: {str(e)}")
+            self.start_reconnect()
+            return False
+        self.set_stream(stream)
+        return True
+
+    def set_stream(self, stream):
+        with self.lock:
+            self.stream = stream
+            self.connected_at = self.clock()
+            self.gap_started = None
+            self.generation += 1
+
+    def read(self, frames, drain=False):
+        """读取一块数据，流失效时返回 None 并在后台开始重连
+
+        drain 为 True 时读出缓冲区中已有的全部数据（至少 frames 帧），避免 PortAudio 溢出丢帧
+        """
+        stream = self.stream
+        if stream is None:
+            return None
+        try:
+            if not stream.is_active():
+                raise IOError("音频流未激活")
+            if drain:
+                frames = max(frames, stream.get_read_available())
+            return stream.read(frames, exception_on_overflow=False)
+        except Exception as e:
+            self.handle_failure(stream, e)
+            return None
+
+    def handle_failure(self, stream, error):
+        """标记中断开始，交给后台线程关闭旧流并重连"""
+        with self.lock:
+            if self.stream is not stream:
+                return
+            now = self.clock()
+            # 只有持续正常一段时间后才重置退避，避免“能打开但一读就失败”的设备被反复重建
+            if self.connected_at is not None and now - self.connected_at >= self.healthy_after:
+                self.backoff = self.initial_backoff
+            self.stream = None
+            self.failed_stream = stream
+            self.connected_at = None
+            self.gap_started = now
+        self.error_log.log('stream_failure', f"音频流失效，开始尝试重连: {str(error)}")
+        self.start_reconnect()
+
+    def start_reconnect(self):
+        # 用加锁的标志而非 is_alive() 判断：重连线程恢复音频流后、退出前若流再次失效，
+        # 由该线程在退出前的检查中继续重连，不会出现无人重连的情况
+        with self.lock:
+            if self.reconnecting:
+                return
+            self.reconnecting = True
+            self.reconnect_thread = threading.Thread(target=self._reconnect_worker,
+                                                     name="AudioReconnect", daemon=True)
+            thread = self.reconnect_thread
+        thread.start()
+
+    @staticmethod
+    def close_stream(stream):
+        try:
+            stream.stop_stream()
+        except Exception:
+            pass
+        try:
+            stream.close()
+        except Exception:
+            pass
+
+    def _reconnect_worker(self):
+        while True:
+            # 只有在锁内确认音频流已恢复（或已停止监测）时才退出，并同时清除 reconnecting
+            with self.lock:
+                if self.stream is not None or self.stop_event.is_set():
+                    self.reconnecting = False
+                    return
+                failed_stream, self.failed_stream = self.failed_stream, None
+            if failed_stream is not None:
+                self.close_stream(failed_stream)
+
+            backoff = self.backoff
+            if self.stop_event.wait(backoff):
+                continue
+            # 无论本次是否打开成功都加倍，直到音频流持续正常后才在 handle_failure 中重置
+            self.backoff = min(backoff * 2, self.max_backoff)
+            try:
+                stream = self.open_stream(True)
+            except Exception as e:
+                self.error_log.log('reconnect_failure',
+                                   f"音频设备重连失败，{self.backoff:.1f} 秒后重试: {str(e)}")
+                continue
+
+            if self.stop_event.is_set():
+                # 重连期间已停止监测
+                self.close_stream(stream)
+                continue
+            gap_started = self.gap_started
+            self.set_stream(stream)
+            if gap_started is not None:
+                logger.info(f"音频设备已恢复，中断 {self.clock() - gap_started:.1f} 秒")
+
+    def stop(self):
+        """停止重连并关闭音频流"""
+        self.stop_event.set()
+        if self.reconnect_thread is not None:
+            self.reconnect_thread.join()
+            self.reconnect_thread = None
+        with self.lock:
+            stream, self.stream = self.stream, None
+            failed_stream, self.failed_stream = self.failed_stream, None
+        for leftover in (stream, failed_stream):
+            if leftover is not None:
+                self.close_stream(leftover)
+
+
+class UlawWavWriter:
+    """8-bit μ-law WAV 写入（无 FLAC 库时的后备格式）"""
+
+    HEADER_SIZE = 58
+    SEGMENT_END = (0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF)
+
+    def __init__(self, path, rate):
+        self.path = path
+        self.rate = rate
+        self.data_size = 0
+        self.file = open(path, 'wb')
+        self.file.write(self.build_header(0))
+
+    def build_header(self, data_size):
+        """RIFF 头，非 PCM 格式需要 fact 块"""
+        pad = data_size % 2
+        return (b'RIFF' + struct.pack('<I', self.HEADER_SIZE - 8 + data_size + pad) + b'WAVE'
+                + b'fmt ' + struct.pack('<IHHIIHHH', 18, 7, 1, self.rate, self.rate, 1, 8, 0)
+                + b'fact' + struct.pack('<II', 4, data_size)
+                + b'data' + struct.pack('<I', data_size))
+
+    @staticmethod
+    def encode(samples):
+        """16 位线性 PCM 转 G.711 μ-law"""
+        import numpy as np
+
+        x = samples.astype(np.int32) >> 2
+        negative = x < 0
+        mask = np.where(negative, 0x7F, 0xFF)
+        x = np.minimum(np.where(negative, -x, x), 8159) + 0x21
+        segment = np.searchsorted(UlawWavWriter.SEGMENT_END, x)
+        code = np.where(segment >= 8, 0x7F, (segment << 4) | ((x >> (segment + 1)) & 0x0F))
+        return (code ^ mask).astype(np.uint8)
+
+    def write(self, samples):
+        data = self.encode(samples).tobytes()
+        self.file.write(data)
+        self.data_size += len(data)
+
+    def close(self):
+        if self.data_size % 2:
+            self.file.write(b'\x00')
+        self.file.seek(0)
+        self.file.write(self.build_header(self.data_size))
+        self.file.close()
+
+
+class AudioArchiver:
+    """原始音频存档：采集线程只负责入队，编码与写盘在后台线程完成"""
+
+    def __init__(self, archive_dir, rate, segment_minutes=10, quota_mb=1024,
+                 retention_days=30, queue_size=512):
+        self.archive_dir = archive_dir
+        self.rate = rate
+        self.segment_seconds = segment_minutes * 60
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self.retention_days = retention_days
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.dropped_chunks = 0
+        self.thread = None
+
+        # 有 soundfile(libsndfile) 时使用 FLAC，否则降采样为 μ-law WAV
+        try:
+            import soundfile
+            self.soundfile = soundfile
+            self.extension = 'flac'
+        except ImportError:
+            self.soundfile = None
+            self.extension = 'wav'
+        self.downsample = 1 if self.soundfile else 4
+
+    def start(self):
+        """启动编码线程"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._worker, name="AudioArchiver", daemon=True)
+        self.thread.start()
+        logger.info(f"音频存档已开启，格式: {self.extension}")
+
+    def feed(self, session_ts, data, stream_id=0, captured_at=None):
+        """送入一块采集数据，session_ts 与 records/raw/<ts>.json 对应，会话变化时编码线程自动换文件
+
+        stream_id 在设备重连后改变，此时另起一个分段文件，使中断前后的音频与时间线上标记的中断对应；
+        captured_at 为读完这块数据时的 time.monotonic()，用于补齐丢失的时间。
+        队列满时直接丢弃，绝不阻塞采集
+        """
+        if captured_at is None:
+            captured_at = time.monotonic()
+        try:
+            self.queue.put_nowait((session_ts, stream_id, captured_at, data))
+        except queue.Full:
+            self.dropped_chunks += 1
+
+    def stop(self, timeout=1):
+        """通知编码线程写完剩余数据后结束；只等待 timeout 秒，不在队列上阻塞"""
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            logger.warning("音频存档线程仍在写入剩余数据，将在后台完成")
+        self.thread = None
+        if self.dropped_chunks:
+            logger.warning(f"音频存档因磁盘过慢丢弃了 {self.dropped_chunks} 个数据块")
+
+    def open_writer(self, session_ts, part):
+        """创建一个分段文件: audio/<ts>/<ts>_<part>.<ext>"""
+        session_dir = os.path.join(self.archive_dir, session_ts)
+        os.makedirs(session_dir, exist_ok=True)
+        path = os.path.join(session_dir, f"{session_ts}_{part:03d}.{self.extension}")
+        if self.soundfile:
+            return self.soundfile.SoundFile(path, 'w', samplerate=self.rate, channels=1,
+                                            format='FLAC', subtype='PCM_16')
+        return UlawWavWriter(path, self.rate // self.downsample)
+
+    def _worker(self):
+        import numpy as np
+
+        writer = None
+        session_ts = None
+        stream_id = None
+        part = 0
+        part_start = 0.0  # 本段第一帧的采集时刻（monotonic）
+        written = 0  # 本段已写入的帧数（原始采样率，含补齐的静音）
+        carry = np.zeros(0, dtype=np.int16)  # 降采样时不足一组的剩余采样
+        failed = False  # 写入出错后跳过本会话剩余数据，避免错误刷屏
+        self.enforce_quota()
+
+        while True:
+            try:
+                item_ts, item_stream_id, captured_at, payload = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                # 停止后把队列中已有的数据写完再退出
+                if self.stop_event.is_set():
+                    break
+                continue
+
+            try:
+                samples = np.frombuffer(payload, dtype=np.int16)
+                chunk_start = captured_at - len(samples) / self.rate
+
+                if item_ts != session_ts:
+                    if writer is not None:
+                        writer = self.close_writer(writer)
+                        self.enforce_quota()
+                    session_ts, stream_id, part, failed = item_ts, item_stream_id, 0, False
+                if failed:
+                    continue
+
+                # 设备重连或本段时长已满时另起一段，分段按实际经过的时间而非帧数
+                if writer is not None and (item_stream_id != stream_id
+                                           or chunk_start - part_start >= self.segment_seconds):
+                    writer = self.close_writer(writer)
+                    part += 1
+                    self.enforce_quota()
+                stream_id = item_stream_id
+
+                if writer is None:
+                    writer = self.open_writer(session_ts, part)
+                    part_start, written, carry = chunk_start, 0, np.zeros(0, dtype=np.int16)
+                else:
+                    # 采集中丢失的时间（溢出、队列满被丢弃）用静音补齐，使文件内时间与实际时间一致
+                    missing = int(round((chunk_start - part_start) * self.rate)) - written
+                    if missing > self.rate // 10:
+                        missing = min(missing, int(self.segment_seconds * self.rate))
+                        carry = self.write_samples(writer, np.zeros(missing, dtype=np.int16), carry)
+                        written += missing
+
+                carry = self.write_samples(writer, samples, carry)
+                written += len(samples)
+
+            except Exception as e:
+                logger.error(f"音频存档写入失败，本会话停止存档: {str(e)}")
+                if writer is not None:
+                    writer = self.close_writer(writer)
+                failed = True
+
+        if writer is not None:
+            self.close_writer(writer)
+        self.enforce_quota()
+
+    def write_samples(self, writer, samples, carry):
+        """写入一段采样（必要时降采样），返回降采样后剩余的采样"""
+        import numpy as np
+
+        if self.downsample == 1:
+            writer.write(samples)
+            return carry
+        samples = np.concatenate((carry, samples))
+        usable = len(samples) - len(samples) % self.downsample
+        writer.write(samples[:usable].reshape(-1, self.downsample).mean(axis=1).astype(np.int16))
+        return samples[usable:]
+
+    @staticmethod
+    def close_writer(writer):
+        """关闭分段文件（补写文件头），出错时只记录日志；总是返回 None"""
+        try:
+            writer.close()
+        except Exception as e:
+            logger.error(f"关闭音频存档文件失败: {str(e)}")
+        return None
+
+    def enforce_quota(self):
+        """删除过期文件，并在超出配额时从最旧的文件开始删除"""
+        try:
+            files = []
+            for root, _, names in os.walk(self.archive_dir):
+                for name in names:
+                    path = os.path.join(root, name)
+                    stat = os.stat(path)
+                    files.append((stat.st_mtime, stat.st_size, path))
+            files.sort()
+
+            expire_before = time.time() - self.retention_days * 86400
+            total = sum(size for _, size, _ in files)
+            for mtime, size, path in files:
+                if mtime >= expire_before and total <= self.quota_bytes:
+                    break
+                os.remove(path)
+                total -= size
+                logger.info(f"已清理音频存档: {path}")
+
+            for root, dirs, names in os.walk(self.archive_dir, topdown=False):
+                if root != self.archive_dir and not dirs and not names:
+                    os.rmdir(root)
+        except Exception as e:
+            logger.error(f"清理音频存档失败: {str(e)}")
+
+
+class TrendAnalytics:
+    """逐秒音量的趋势分析（NumPy 向量化），图表只使用降采样后的序列"""
+
+    def __init__(self, levels, rules, rolling_window=60, quiet_min_seconds=30, max_points=600, max_bars=120):
+        import numpy as np
+
+        self.rules = rules
+        self.levels = np.array(levels, dtype=np.int64)  # 复制一份，与逐秒缓冲区脱离
+        self.seconds = len(self.levels)
+        n = self.seconds
+        positions = np.arange(n)
+
+        # 设备中断的秒不参与统计
+        self.valid = (self.levels >= 0) & (self.levels <= 100)
+        self.gap_periods = self.find_runs(~self.valid, 1)
+        valid_levels = np.where(self.valid, self.levels, 0)
+
+        # 滑动平均
+        cumsum = np.concatenate(([0.0], np.cumsum(valid_levels, dtype=np.float64)))
+        cumcount = np.concatenate(([0], np.cumsum(self.valid)))
+        window_start = np.maximum(positions - rolling_window + 1, 0)
+        self.rolling_window = rolling_window
+        self.rolling = (cumsum[positions + 1] - cumsum[window_start]) / np.maximum(
+            cumcount[positions + 1] - cumcount[window_start], 1)
+
+        # 每分钟各评级档位的次数与平均音量
+        self.tiers = rules.arrays()[0][np.clip(self.levels, 0, 100)]
+        tier_total = len(rules.tiers)
+        minutes = positions // 60
+        self.minute_count = (n + 59) // 60
+        self.minute_hist = np.bincount((minutes * tier_total + self.tiers)[self.valid],
+                                       minlength=self.minute_count * tier_total).reshape(-1, tier_total)
+        minute_sizes = np.bincount(minutes, weights=self.valid, minlength=self.minute_count)
+        self.minute_mean = np.bincount(minutes, weights=valid_levels, minlength=self.minute_count) / np.maximum(
+            minute_sizes, 1)
+
+        # 安静时段：音量持续低于最低得分档（默认即 Good 以下）达到 quiet_min_seconds
+        self.quiet_level = rules.tiers[-2]['min_level'] if len(rules.tiers) > 1 else 1
+        self.quiet_min_seconds = quiet_min_seconds
+        self.quiet_periods = self.find_runs(self.valid & (self.levels < self.quiet_level), quiet_min_seconds)
+        self.quiet_mask = np.zeros(n, dtype=bool)
+        for start, end in self.quiet_periods:
+            self.quiet_mask[start:end] = True
+
+        # 连击时间线
+        self.combo_counts = rules.rescore(self.levels)['combo_counts']
+
+        # 降采样：每块取均值（连击取最大值），点数不超过 max_points
+        self.chart_step = max(1, -(-n // max_points))
+        block_starts = np.arange(0, n, self.chart_step)
+        if n:
+            block_sizes = np.diff(np.append(block_starts, n))
+            self.chart_levels = np.add.reduceat(valid_levels, block_starts) / np.maximum(
+                np.add.reduceat(self.valid.astype(np.int64), block_starts), 1)
+            self.chart_rolling = np.add.reduceat(self.rolling, block_starts) / block_sizes
+            self.chart_combo = np.maximum.reduceat(self.combo_counts, block_starts)
+        else:
+            self.chart_levels = self.chart_rolling = self.chart_combo = np.zeros(0)
+
+        # 柱状图按若干分钟合并，柱数不超过 max_bars
+        self.bar_minutes = max(1, -(-self.minute_count // max_bars))
+        if self.minute_count:
+            bar_starts = np.arange(0, self.minute_count, self.bar_minutes)
+            self.bar_hist = np.add.reduceat(self.minute_hist, bar_starts, axis=0)
+        else:
+            self.bar_hist = np.zeros((0, tier_total), dtype=np.int64)
+
+    @staticmethod
+    def find_runs(mask, min_length):
+        """找出 mask 中连续为 True 且长度不小于 min_length 的区间 [start, end)"""
+        import numpy as np
+
+        edges = np.diff(np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        keep = ends - starts >= min_length
+        return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+    def summary_text(self):
+        """趋势摘要"""
+        lines = [f"安静时段（音量 <{self.quiet_level} 持续 {self.quiet_min_seconds} 秒以上）: {len(self.quiet_periods)} 段"]
+        for start, end in self.quiet_periods[:10]:
+            lines.append(f"    {start // 60:02d}:{start % 60:02d} - {end // 60:02d}:{end % 60:02d}  ({end - start} 秒)")
+        if len(self.quiet_periods) > 10:
+            lines.append(f"    …… 另有 {len(self.quiet_periods) - 10} 段")
+        if self.gap_periods:
+            lines.append(f"设备中断: {len(self.gap_periods)} 次，共 {int((~self.valid).sum())} 秒")
+        if self.minute_count:
+            best = int(self.minute_mean.argmax())
+            lines.append(f"音量最高的一分钟: 第 {best + 1} 分钟（平均 {self.minute_mean[best]:.1f}%）")
+        return "\n".join(lines)
+
+    def export_csv(self, path):
+        """导出逐秒序列到 path，逐分钟统计到 <path>_minutes.csv"""
+        import csv
+
+        labels = [t['label'] for t in self.rules.tiers]
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['秒', '音量级别', f'{self.rolling_window}秒滑动平均', '评级', '连击数', '安静时段'])
+            for second in range(self.seconds):
+                if not self.valid[second]:
+                    writer.writerow([second, '', '', '中断', int(self.combo_counts[second]), 0])
+                    continue
+                writer.writerow([second, int(self.levels[second]), f"{self.rolling[second]:.2f}",
+                                 labels[self.tiers[second]], int(self.combo_counts[second]),
+                                 int(self.quiet_mask[second])])
+
+        minutes_path = os.path.splitext(path)[0] + '_minutes.csv'
+        with open(minutes_path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['分钟', '平均音量'] + labels)
+            for minute in range(self.minute_count):
+                writer.writerow([minute + 1, f"{self.minute_mean[minute]:.2f}"]
+                                + self.minute_hist[minute].tolist())
+        return minutes_path
+
 
 class VolumeProgressBar(QProgressBar):
     def __init__(self, parent=None):
@@ -127,12 +932,122 @@ class WaveformWidget(QWidget):
         painter.end()
 
 
+class TrendChartWidget(QWidget):
+    """趋势折线图：音量、滑动平均、安静时段与连击时间线"""
+
+    def __init__(self, analytics, parent=None):
+        super().__init__(parent)
+        self.analytics = analytics
+        self.setMinimumHeight(200)
+
+    def paintEvent(self, event):
+        analytics = self.analytics
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(event.rect(), QColor(240, 240, 240))
+
+        width = self.width()
+        plot_height = self.height() * 0.7  # 上方画音量，下方画连击
+        combo_top = plot_height + 10
+        combo_height = self.height() - combo_top - 15
+
+        painter.setPen(QColor(200, 200, 200))
+        for i in range(1, 4):
+            y = plot_height * i / 4
+            painter.drawLine(0, int(y), width, int(y))
+
+        if analytics.seconds > 1:
+            scale = width / analytics.seconds
+
+            # 安静时段与设备中断底色
+            for start, end in analytics.quiet_periods:
+                painter.fillRect(int(start * scale), 0, max(1, int((end - start) * scale)), int(plot_height),
+                                 QColor(149, 165, 166, 70))
+            for start, end in analytics.gap_periods:
+                painter.fillRect(int(start * scale), 0, max(1, int((end - start) * scale)), int(plot_height),
+                                 QColor(231, 76, 60, 70))
+
+            def draw_series(values, color, pen_width):
+                if len(values) < 2:
+                    return
+                x_step = width / (len(values) - 1)
+                path = QPainterPath()
+                path.moveTo(0, plot_height * (1 - values[0] / 100))
+                for i in range(1, len(values)):
+                    path.lineTo(i * x_step, plot_height * (1 - values[i] / 100))
+                painter.setPen(QPen(color, pen_width))
+                painter.drawPath(path)
+
+            draw_series(analytics.chart_levels, QColor(41, 128, 185, 90), 1)
+            draw_series(analytics.chart_rolling, QColor(41, 128, 185), 2)
+
+            # 连击时间线
+            max_combo = int(analytics.chart_combo.max()) if len(analytics.chart_combo) else 0
+            if max_combo > 0:
+                bar_width = width / len(analytics.chart_combo)
+                for i, combo in enumerate(analytics.chart_combo):
+                    if combo >= analytics.rules.combo_threshold:
+                        bar_height = combo_height * combo / max_combo
+                        painter.fillRect(int(i * bar_width), int(combo_top + combo_height - bar_height),
+                                         max(1, int(bar_width)), max(1, int(bar_height)), QColor(255, 163, 0))
+
+        painter.setPen(QColor(100, 100, 100))
+        painter.drawText(10, 15, f"音量趋势（粗线为 {analytics.rolling_window} 秒滑动平均，灰色为安静时段，红色为设备中断）")
+        painter.drawText(10, int(combo_top + 12), "连击")
+        painter.drawText(width - 80, self.height() - 3, f"共 {analytics.seconds // 60} 分 {analytics.seconds % 60} 秒")
+
+        painter.end()
+
+
+class MinuteHistogramWidget(QWidget):
+    """每分钟评级分布（堆叠柱状图）"""
+
+    def __init__(self, analytics, parent=None):
+        super().__init__(parent)
+        self.analytics = analytics
+        self.setMinimumHeight(160)
+        self.colors = []
+        for tier in analytics.rules.tiers:
+            match = re.search(r'#[0-9a-fA-F]{6}', tier['style'])
+            self.colors.append(QColor(match.group(0)) if match else QColor(149, 165, 166))
+
+    def paintEvent(self, event):
+        analytics = self.analytics
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), QColor(240, 240, 240))
+
+        top = 20
+        plot_height = self.height() - top - 5
+        bars = analytics.bar_hist
+        if len(bars):
+            bar_width = self.width() / len(bars)
+            for i, counts in enumerate(bars):
+                total = counts.sum()
+                if total == 0:
+                    continue
+                y = top + plot_height
+                # 从最低档往上堆叠，高档位在上方
+                for tier_index in reversed(range(len(counts))):
+                    segment = plot_height * counts[tier_index] / total
+                    y -= segment
+                    painter.fillRect(int(i * bar_width), int(y), max(1, int(bar_width) - 1),
+                                     int(segment + 1), self.colors[tier_index])
+
+        painter.setPen(QColor(100, 100, 100))
+        painter.drawText(10, 15, f"评级分布（每柱 {analytics.bar_minutes} 分钟）")
+
+        painter.end()
+
+
 class ReportDialog(QDialog):
     """报告显示对话框"""
 
-    def __init__(self, report_data_text, parent=None):
+    def __init__(self, report_data_text, parent=None, analytics=None, session_ts=None):
         super().__init__(parent)
         self.report_data_text = report_data_text
+        self.analytics = analytics
+        # 会话时间戳，用于导出文件的默认文件名，与 records 下的报告对应
+        self.session_ts = session_ts
         self.init_ui()
 
     def init_ui(self):
@@ -151,20 +1066,60 @@ class ReportDialog(QDialog):
         report_text.setFont(QFont("Microsoft YaHei", 10))
         report_text.setReadOnly(True)
         report_text.setText(self.report_data_text)
-        layout.addWidget(report_text)
+
+        if self.analytics is not None and self.analytics.seconds > 0:
+            tabs = QTabWidget()
+            tabs.addTab(report_text, "报告")
+
+            trend_page = QWidget()
+            trend_layout = QVBoxLayout(trend_page)
+            trend_layout.addWidget(TrendChartWidget(self.analytics))
+            trend_layout.addWidget(MinuteHistogramWidget(self.analytics))
+            summary_label = QLabel(self.analytics.summary_text())
+            summary_label.setFont(QFont("Microsoft YaHei", 9))
+            trend_layout.addWidget(summary_label)
+            tabs.addTab(trend_page, "趋势")
+
+            layout.addWidget(tabs)
+        else:
+            layout.addWidget(report_text)
 
         button_layout = QHBoxLayout()
+        if self.analytics is not None and self.analytics.seconds > 0:
+            export_button = QPushButton("导出 CSV")
+            export_button.clicked.connect(self.export_csv)
+            button_layout.addWidget(export_button)
+
         close_button = QPushButton("保存并关闭")
         close_button.clicked.connect(self.accept)
         button_layout.addWidget(close_button)
 
         layout.addLayout(button_layout)
 
+    def export_csv(self):
+        """导出趋势序列为 CSV"""
+        filename = f"trend_{self.session_ts}.csv" if self.session_ts else "trend.csv"
+        path, _ = QFileDialog.getSaveFileName(self, "导出 CSV", os.path.join("./ClassVoiceMonitor/records", filename),
+                                              "CSV 文件 (*.csv)")
+        if not path:
+            return
+        try:
+            minutes_path = self.analytics.export_csv(path)
+            logger.info(f"趋势数据已导出到: {path}, {minutes_path}")
+        except Exception as e:
+            logger.error(f"导出 CSV 失败: {str(e)}")
+            QMessageBox.critical(self, '错误', '导出 CSV 失败!\n错误信息:' + str(e))
+
 
 class Main(QMainWindow):
-    def __init__(self):
+    # 后台预热线程完成后发出，由 Qt 排队到界面线程处理
+    audio_prewarmed = pyqtSignal()
+
+    def __init__(self, profiler=None):
         super().__init__()
 
+        self.profiler = profiler or StartupProfiler()
+
         self.version = "0.1.1"
         self.config_version = "1.0.0"
 
@@ -186,11 +1141,37 @@ class Main(QMainWindow):
         self.is_recording = False
         self.start_time = None
         self.end_time = None
-        self.rating_history = []
+        self.rules = RatingRules.from_config(None)
+        # 配置中的评级规则无效时为 False，保存配置时不覆盖用户原有的 rating_rules
+        self.rating_rules_valid = True
+        self.tier_counts = []
         self.combo_history = []
+        self.level_history = None
+
+        # 连续监测（分段）变量
+        self.continuous_mode = False  # 开启后按时段/分钟数自动分段并保存报告
+        self.segment_minutes = 45  # 未配置时段时，每段的分钟数
+        self.segment_times = []  # 时段分界，如 ["08:00", "08:45"]
+        self.segment_end_time = None
+
+        # 原始音频存档变量（默认关闭）
+        self.archive_audio = False
+        self.archive_segment_minutes = 10
+        self.archive_quota_mb = 1024
+        self.archive_retention_days = 30
+        self.archiver = None
+
+        # 音频设备变量（PortAudio 在后台预热，见 prewarm_audio）
+        self.audio = None
+        self.supervisor = None
+        self.error_log = RateLimitedLogger()
+        self.input_devices = []
+        self.prewarm_thread = None
+        self.startup_prewarmed = False
 
         self.init_ui()
         self.read_config()
+        self.audio_prewarmed.connect(self.on_audio_prewarmed)
 
     def init_ui(self):
         """初始化用户界面"""
@@ -307,6 +1288,11 @@ class Main(QMainWindow):
         self.stop_button.setEnabled(False)
         button_layout.addWidget(self.stop_button)
 
+        self.rescore_button = QPushButton("用其他规则重算")
+        self.rescore_button.setFont(QFont("Microsoft YaHei", 12))
+        self.rescore_button.clicked.connect(self.rescore_from_file)
+        button_layout.addWidget(self.rescore_button)
+
         layout.addLayout(button_layout)
 
         # 添加波形显示部件
@@ -327,7 +1313,7 @@ class Main(QMainWindow):
             if not os.path.exists(config_file_dir):
                 with open(config_file_dir, 'w+', encoding='utf-8') as config_file:
                     json.dump(config_default, config_file)
-            logging.warning(f"已创建配置文件:{config_file_dir}")
+            logger.warning(f"已创建配置文件:{config_file_dir}")
 
         try:
             config_default = {
@@ -335,6 +1321,14 @@ class Main(QMainWindow):
                 'window_width': self.width(),
                 'window_height': self.height(),
                 'max_rms': self.max_rms,
+                'continuous_mode': self.continuous_mode,
+                'segment_minutes': self.segment_minutes,
+                'segment_times': self.segment_times,
+                'archive_audio': self.archive_audio,
+                'archive_segment_minutes': self.archive_segment_minutes,
+                'archive_quota_mb': self.archive_quota_mb,
+                'archive_retention_days': self.archive_retention_days,
+                'rating_rules': self.rules.to_config(),
             }
 
             try:
@@ -350,16 +1344,67 @@ class Main(QMainWindow):
                     window_height = config['window_height']
                     self.resize(window_width, window_height)
 
+                    # 旧版配置文件中可能没有以下项
+                    self.continuous_mode = bool(config.get('continuous_mode', self.continuous_mode))
+                    self.segment_minutes = self.parse_positive_int(config, 'segment_minutes', self.segment_minutes)
+                    self.segment_times = self.parse_segment_times(config.get('segment_times', []))
+                    self.archive_audio = bool(config.get('archive_audio', self.archive_audio))
+                    self.archive_segment_minutes = self.parse_positive_int(config, 'archive_segment_minutes',
+                                                                           self.archive_segment_minutes)
+                    self.archive_quota_mb = self.parse_positive_int(config, 'archive_quota_mb', self.archive_quota_mb)
+                    self.archive_retention_days = self.parse_positive_int(config, 'archive_retention_days',
+                                                                          self.archive_retention_days)
+                    if 'rating_rules' in config:
+                        self.load_rating_rules(config['rating_rules'])
+
             except FileNotFoundError as e:
-                logging.warning(f"文件不存在:{str(e)}.尝试创建配置文件...")
+                logger.warning(f"文件不存在:{str(e)}.尝试创建配置文件...")
                 create_config()
 
 
         except Exception as e:
-            logging.error(f'配置文件读写错误:{str(e)}')
+            logger.error(f'配置文件读写错误:{str(e)}')
             QMessageBox.critical(self, '错误',
                                  '配置文件读写错误!\n请尝试删除配置文件夹中的config.json\n错误信息:' + str(e))
 
+    def load_rating_rules(self, rules_config):
+        """加载评级规则，无效时保留默认规则并提示，不影响其他配置项"""
+        try:
+            self.rules = RatingRules.from_config(rules_config)
+            self.rating_rules_valid = True
+        except ValueError as e:
+            self.rating_rules_valid = False
+            logger.error(f"{str(e)}，已使用默认评级规则")
+            QMessageBox.warning(self, '警告',
+                                f'{str(e)}\n本次将使用默认评级规则，配置文件中的 rating_rules 不会被覆盖')
+
+    @staticmethod
+    def parse_positive_int(config, key, default):
+        """读取正整数配置项，无效时记录日志并使用默认值"""
+        value = config.get(key, default)
+        try:
+            if isinstance(value, bool):
+                raise TypeError
+            return max(1, int(value))
+        except (TypeError, ValueError, OverflowError):
+            logger.error(f"配置项 {key} 无效: {value!r}，已使用默认值 {default}")
+            return default
+
+    @staticmethod
+    def parse_segment_times(values):
+        """校验时段分界配置，任一项无效时记录日志并退回按分钟数分段"""
+        if not isinstance(values, list):
+            logger.error(f"配置项 segment_times 应为列表: {values!r}，已改为按 segment_minutes 分段")
+            return []
+        times = set()
+        for value in values:
+            try:
+                times.add(datetime.datetime.strptime(value, '%H:%M').strftime('%H:%M'))
+            except (TypeError, ValueError):
+                logger.error(f"配置项 segment_times 中的时间无效: {value!r}，已改为按 segment_minutes 分段")
+                return []
+        return sorted(times)
+
     def save_config(self):
         """配置文件写入"""
         try:
@@ -370,12 +1415,21 @@ class Main(QMainWindow):
                 config['window_width'] = self.width()
                 config['window_height'] = self.height()
                 config['max_rms'] = self.max_rms
+                config['continuous_mode'] = self.continuous_mode
+                config['segment_minutes'] = self.segment_minutes
+                config['segment_times'] = self.segment_times
+                config['archive_audio'] = self.archive_audio
+                config['archive_segment_minutes'] = self.archive_segment_minutes
+                config['archive_quota_mb'] = self.archive_quota_mb
+                config['archive_retention_days'] = self.archive_retention_days
+                if self.rating_rules_valid:
+                    config['rating_rules'] = self.rules.to_config()
             with open(config_file_dir, 'w', encoding='utf-8') as config_file:
                 # 写入覆写后的 config
                 json.dump(config, config_file, ensure_ascii=False)
                 logger.info(f"配置文件已保存:{config_file_dir}")
         except Exception as e:
-            logging.critical(f"配置文件写入错误:{str(e)}")
+            logger.critical(f"配置文件写入错误:{str(e)}")
             QMessageBox.critical(self, '错误', '配置文件写入错误！')
 
     # def resizeEvent(self, event):
@@ -398,14 +1452,26 @@ class Main(QMainWindow):
             self.init_audio()
             self.is_recording = True
             self.start_time = datetime.datetime.now()
-            self.score = 0
-            self.combo_count = 0
-            self.rating_history = []
-            self.combo_history = []
+            self.reset_session_state()
+
+            if self.continuous_mode:
+                # 连续模式下缓冲区按单段时长预分配，之后每段复用
+                self.level_history = LevelHistory(self.segment_capacity())
+                self.segment_end_time = self.next_segment_boundary(self.start_time)
+                logger.info(f"连续监测模式，本段结束于: {self.segment_end_time.strftime('%H:%M:%S')}")
+            else:
+                self.level_history = LevelHistory()
+
+            if self.archive_audio and self.supervisor is not None:
+                self.archiver = AudioArchiver('./ClassVoiceMonitor/records/audio', self.RATE,
+                                              segment_minutes=self.archive_segment_minutes,
+                                              quota_mb=self.archive_quota_mb,
+                                              retention_days=self.archive_retention_days)
+                self.archiver.start()
 
             self.start_button.setEnabled(False)
             self.stop_button.setEnabled(True)
-            self.status_bar.showMessage("开始监测")
+            self.status_bar.showMessage("开始监测（连续模式）" if self.continuous_mode else "开始监测")
 
         except Exception as e:
             error_msg = f"启动录音失败: {str(e)}"
@@ -423,13 +1489,20 @@ class Main(QMainWindow):
             self.rating_timer.stop()
 
         # 关闭音频流
-        if hasattr(self, 'stream'):
-            self.stream.stop_stream()
-            self.stream.close()
-        if hasattr(self, 'audio'):
+        if self.supervisor is not None:
+            self.supervisor.stop()
+            self.supervisor = None
+        if self.audio is not None:
             self.audio.terminate()
+            self.audio = None
+
+        self.stop_archiver()
+
+        # 为下一次监测预热，同时刷新设备列表
+        self.prewarm_audio()
 
         self.end_time = datetime.datetime.now()
+        self.close_combo()
 
         # 生成报告
         try:
@@ -437,7 +1510,10 @@ class Main(QMainWindow):
             report_data_text = self.generate_report_text(report_data)
 
             # 显示报告对话框
-            report_dialog = ReportDialog(report_data_text, self)
+            analytics = None
+            if self.level_history is not None and len(self.level_history):
+                analytics = TrendAnalytics(self.level_history.values(), self.rules)
+            report_dialog = ReportDialog(report_data_text, self, analytics, self.session_timestamp())
             report_dialog.exec_()
 
         except Exception as e:
@@ -451,52 +1527,99 @@ class Main(QMainWindow):
         self.stop_button.setEnabled(False)
         self.status_bar.showMessage("监测已结束")
 
-    def generate_report_data(self):
-        """生成报告数据"""
-        duration = (self.end_time - self.start_time).total_seconds()
-        avg_score_rate = self.score / duration if duration > 0 else 0
+    def rescore_from_file(self):
+        """选择一份已保存的记录和规则文件重算，结果显示在报告对话框中并保存到记录旁"""
+        raw_path, _ = QFileDialog.getOpenFileName(self, "选择监测记录", "./ClassVoiceMonitor/records/raw",
+                                                  "JSON 文件 (*.json)")
+        if not raw_path:
+            return
+        rules_path, _ = QFileDialog.getOpenFileName(self, "选择规则文件（取消则使用当前规则）",
+                                                    "./ClassVoiceMonitor", "JSON 文件 (*.json)")
+        try:
+            rules = load_rules_file(rules_path) if rules_path else self.rules
+            report_text, levels = rescore_record(raw_path, rules)
+            save_rescored_report(raw_path, report_text)
+        except Exception as e:
+            logger.error(f"重新评分失败: {str(e)}")
+            QMessageBox.critical(self, '错误', '重新评分失败!\n错误信息:' + str(e))
+            return
 
-        # 统计评级次数
-        critical_perfect_count = sum(1 for r in self.rating_history if r['rating'] == 'CRITICAL PERFECT!')
-        perfect_count = sum(1 for r in self.rating_history if r['rating'] == 'Perfect!')
-        great_count = sum(1 for r in self.rating_history if r['rating'] == 'Great!')
-        good_count = sum(1 for r in self.rating_history if r['rating'] == 'Good')
-        miss_count = sum(1 for r in self.rating_history if r['rating'] == 'Miss')
+        analytics = TrendAnalytics(levels, rules) if levels else None
+        session_ts = os.path.splitext(os.path.basename(raw_path))[0]
+        report_dialog = ReportDialog(report_text, self, analytics, session_ts)
+        report_dialog.exec_()
 
-        total_ratings = len(self.rating_history)
+    def session_timestamp(self):
+        """当前会话（分段）的时间戳，用于报告与存档文件名"""
+        return self.start_time.strftime("%Y%m%d_%H%M%S")
 
-        # 计算百分比
-        critical_perfect_percent = (critical_perfect_count / total_ratings * 100) if total_ratings > 0 else 0
-        perfect_percent = (perfect_count / total_ratings * 100) if total_ratings > 0 else 0
-        great_percent = (great_count / total_ratings * 100) if total_ratings > 0 else 0
-        good_percent = (good_count / total_ratings * 100) if total_ratings > 0 else 0
-        miss_percent = (miss_count / total_ratings * 100) if total_ratings > 0 else 0
+    def stop_archiver(self, timeout=1):
+        """结束音频存档"""
+        if self.archiver is not None:
+            self.archiver.stop(timeout)
+            self.archiver = None
 
-        # 计算连击统计
-        total_combos = sum(self.combo_history)
-        max_combo = max(self.combo_history) if self.combo_history else 0
-        avg_combo_duration = sum(self.combo_history) / len(self.combo_history) if self.combo_history else 0
+    def reset_session_state(self):
+        """重置一段监测的得分与统计"""
+        self.score = 0
+        self.combo_count = 0
+        self.tier_counts = [0] * len(self.rules.tiers)
+        self.combo_history = []
+        if self.level_history is not None:
+            self.level_history.clear()
 
-        return {
-            'start_time': self.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'end_time': self.end_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'duration': int(duration),
-            'total_score': self.score,
-            'avg_score_rate': avg_score_rate,
-            'total_combos': total_combos,
-            'max_combo': max_combo,
-            'avg_combo_duration': avg_combo_duration,
-            'critical_perfect_count': critical_perfect_count,
-            'perfect_count': perfect_count,
-            'great_count': great_count,
-            'good_count': good_count,
-            'miss_count': miss_count,
-            'critical_perfect_percent': critical_perfect_percent,
-            'perfect_percent': perfect_percent,
-            'great_percent': great_percent,
-            'good_percent': good_percent,
-            'miss_percent': miss_percent,
-        }
+    def close_combo(self):
+        """结束当前连击并计入连击历史"""
+        if self.combo_count >= self.rules.combo_threshold:
+            self.combo_history.append(self.combo_count)
+        self.combo_count = 0
+
+    def segment_capacity(self):
+        """单段最长秒数，用于预分配逐秒记录"""
+        if not self.segment_times:
+            return self.segment_minutes * 60 + 60
+        minutes = [int(t[:2]) * 60 + int(t[3:]) for t in self.segment_times]
+        gaps = [b - a for a, b in zip(minutes, minutes[1:])]
+        gaps.append(minutes[0] + 24 * 60 - minutes[-1])
+        return max(gaps) * 60 + 60
+
+    def next_segment_boundary(self, now):
+        """计算 now 之后的下一个分段时间点"""
+        if not self.segment_times:
+            return now + datetime.timedelta(minutes=self.segment_minutes)
+        for day_offset in (0, 1):
+            day = now.date() + datetime.timedelta(days=day_offset)
+            for t in self.segment_times:
+                boundary = datetime.datetime.combine(day, datetime.datetime.strptime(t, '%H:%M').time())
+                if boundary > now:
+                    return boundary
+        return now + datetime.timedelta(minutes=self.segment_minutes)
+
+    def roll_segment(self, now):
+        """连续模式：结束当前段，保存报告并开始新的一段"""
+        self.end_time = now
+        self.close_combo()
+        try:
+            report_data = self.generate_report_data()
+            self.save_report(report_data)
+            logger.info(f"分段报告已生成: {report_data['start_time']} - {report_data['end_time']}, "
+                        f"得分: {report_data['total_score']}")
+        except Exception as e:
+            logger.error(f"生成分段报告失败: {str(e)}")
+
+        self.start_time = now
+        self.reset_session_state()
+        self.segment_end_time = self.next_segment_boundary(now)
+        self.score_label.setText(f"得分: {self.score}")
+        self.status_bar.showMessage(f"已开始新的分段，本段结束于: {self.segment_end_time.strftime('%H:%M')}")
+
+    def generate_report_data(self):
+        """生成报告数据"""
+        duration = (self.end_time - self.start_time).total_seconds()
+        return self.rules.report_data(self.start_time.strftime('%Y-%m-%d %H:%M:%S'),
+                                      self.end_time.strftime('%Y-%m-%d %H:%M:%S'),
+                                      duration, self.score, self.tier_counts, self.combo_history,
+                                      self.level_history.gap_seconds() if self.level_history is not None else 0)
 
     def save_report(self, report_data):
         """保存报告到文件"""
@@ -506,7 +1629,7 @@ class Main(QMainWindow):
         os.makedirs(log_dir_raw, exist_ok=True)
 
         # 生成文件名
-        timestamp = self.start_time.strftime("%Y%m%d_%H%M%S")
+        timestamp = self.session_timestamp()
         filename = f"监测报告_{timestamp}.txt"
         filepath = os.path.join(log_dir, filename)
 
@@ -520,15 +1643,24 @@ class Main(QMainWindow):
                 f.write(self.generate_report_text(report_data))
             logger.info(f"报告已保存到: {filepath}")
 
+            # 原始数据附带逐秒音量，便于之后复盘
+            raw_data = dict(report_data)
+            if self.level_history is not None:
+                raw_data['levels'] = self.level_history.values().tolist()
             with open(filepath_raw, 'w', encoding='utf-8') as fr:
-                json.dump(report_data, fr)
+                json.dump(raw_data, fr)
             logger.info(f"JSON已保存到: {filepath_raw}")
 
         except Exception as e:
             logger.error(f"保存报告失败: {str(e)}")
 
-    def generate_report_text(self, report_data):
+    @staticmethod
+    def generate_report_text(report_data):
         """生成报告文本"""
+        label_width = max((len(f"{r['label']} {r['condition']}:") for r in report_data['ratings']), default=0)
+        rating_lines = "\n".join(
+            f"    {(r['label'] + ' ' + r['condition'] + ':'):<{label_width}} {r['count']} ({r['percent']:.1f}%)"
+            for r in report_data['ratings'])
         return f"""
 早读报告
 {'=' * 25}
@@ -536,6 +1668,7 @@ class Main(QMainWindow):
     开始时间: {report_data['start_time']}
     结束时间: {report_data['end_time']}
     记录时长: {report_data['duration']} 秒
+    设备中断: {report_data.get('gap_seconds', 0)} 秒
     总得分: {report_data['total_score']}
     平均得分率: {report_data['avg_score_rate']:.2f} 分/秒
             
@@ -545,19 +1678,85 @@ class Main(QMainWindow):
     平均连击时长: {report_data['avg_combo_duration']:.1f} 秒
             
 评级分布:
-    Critical Perfect (>95): {report_data['critical_perfect_count']} ({report_data['critical_perfect_percent']:.1f}%)
-    Perfect (>85):          {report_data['perfect_count']} ({report_data['perfect_percent']:.1f}%)
-    Great (>70):            {report_data['great_count']} ({report_data['great_percent']:.1f}%)
-    Good (>50):             {report_data['good_count']} ({report_data['good_percent']:.1f}%)
-    Miss (<50):             {report_data['miss_count']} ({report_data['miss_percent']:.1f}%)
+{rating_lines}
 {'=' * 25}
         """
 
+    def prewarm_audio(self):
+        """在后台线程中预热 PortAudio 并枚举输入设备"""
+        if self.prewarm_thread is not None and self.prewarm_thread.is_alive():
+            return
+        self.prewarm_thread = threading.Thread(target=self._prewarm_audio_worker,
+                                               name="AudioPrewarm", daemon=True)
+        self.prewarm_thread.start()
+
+    def _prewarm_audio_worker(self):
+        """预热线程：导入重模块、初始化 PortAudio、枚举设备"""
+        audio = None
+        try:
+            with self.profiler.phase("导入 NumPy"):
+                import numpy  # noqa: F401
+            with self.profiler.phase("初始化 PortAudio"):
+                import pyaudio
+                audio = pyaudio.PyAudio()
+            with self.profiler.phase("枚举输入设备"):
+                self.input_devices = self.enumerate_input_devices(audio)
+        except Exception as e:
+            logger.error(f"音频设备预热失败: {str(e)}")
+        finally:
+            # 枚举失败时 PortAudio 实例仍可使用，交给主线程管理，避免泄漏
+            if audio is not None:
+                self.audio = audio
+        self.audio_prewarmed.emit()
+
+    def wait_audio_prewarm(self):
+        """等待预热线程结束"""
+        if self.prewarm_thread is not None:
+            self.prewarm_thread.join()
+            self.prewarm_thread = None
+
+    @staticmethod
+    def enumerate_input_devices(audio):
+        """列出可用的输入设备"""
+        devices = []
+        for index in range(audio.get_device_count()):
+            info = audio.get_device_info_by_index(index)
+            if info.get('maxInputChannels', 0) > 0:
+                devices.append({'index': index, 'name': info.get('name', '')})
+        return devices
+
+    def on_audio_prewarmed(self):
+        """预热完成（界面线程）"""
+        # 只有启动时的预热更新状态栏，结束监测后的再次预热不覆盖“监测已结束”
+        if not self.startup_prewarmed and not self.is_recording:
+            if self.audio is None:
+                self.status_bar.showMessage("音频设备初始化失败 - 请查看控制台")
+            elif not self.input_devices:
+                self.status_bar.showMessage("未检测到输入设备，请检查麦克风")
+            else:
+                self.status_bar.showMessage(f"准备就绪 - 检测到 {len(self.input_devices)} 个输入设备")
+        self.startup_prewarmed = True
+
+        if self.profiler.enabled:
+            report_text = self.profiler.report()
+            self.profiler.enabled = False  # 仅报告首次启动
+            logger.info("\n" + report_text)
+            try:
+                with open('./ClassVoiceMonitor/startup_profile.txt', 'w', encoding='utf-8') as f:
+                    f.write(report_text)
+            except Exception as e:
+                logger.error(f"保存启动耗时报告失败: {str(e)}")
+
     def init_audio(self):
         """初始化音频设备"""
         try:
             logger.info("正在初始化音频设备...")
-            self.audio = pyaudio.PyAudio()
+            import pyaudio
+
+            # 优先使用后台预热好的 PortAudio 实例
+            self.wait_audio_prewarm()
+            if self.audio is None:
+                self.audio = pyaudio.PyAudio()
 
             # 音频流参数
             self.FORMAT = pyaudio.paInt16
@@ -565,17 +1764,10 @@ class Main(QMainWindow):
             self.RATE = 44100
             self.CHUNK = 1024
 
-            # 打开音频流
-            self.stream = self.audio.open(
-                format=self.FORMAT,
-                channels=self.CHANNELS,
-                rate=self.RATE,
-                input=True,
-                frames_per_buffer=self.CHUNK,
-                input_device_index=None  # 使用默认设备
-            )
-
-            logger.info(f"音频设备初始化成功 - 采样率: {self.RATE}, 块大小: {self.CHUNK}")
+            # 打开音频流，之后由守护对象负责断线重连；开始时没有麦克风也会在后台等待设备接入
+            self.supervisor = AudioSupervisor(self.open_audio_stream, error_log=self.error_log)
+            if self.supervisor.start():
+                logger.info(f"音频设备初始化成功 - 采样率: {self.RATE}, 块大小: {self.CHUNK}")
 
             # 创建定时器用于实时更新
             self.timer = QTimer()
@@ -587,16 +1779,42 @@ class Main(QMainWindow):
             self.rating_timer.timeout.connect(self.update_rating)
             self.rating_timer.start(1000)  # 每秒更新一次评分
 
-            self.status_bar.showMessage("正在监听麦克风...")
+            if self.supervisor.connected:
+                self.status_bar.showMessage("正在监听麦克风...")
+            else:
+                self.status_bar.showMessage("未能打开麦克风，正在等待设备连接...")
 
         except Exception as e:
+            if self.supervisor is not None:
+                self.supervisor.stop()
+                self.supervisor = None
             error_msg = f"音频设备初始化失败: {str(e)}"
             logger.info(error_msg)
             traceback.print_exc()
             self.status_bar.showMessage("初始化失败 - 请查看控制台")
 
+    def open_audio_stream(self, reconnect=False):
+        """打开默认输入设备的音频流；重连时重新初始化 PortAudio 以刷新设备列表"""
+        import pyaudio
+
+        if reconnect or self.audio is None:
+            if self.audio is not None:
+                self.audio.terminate()
+            self.audio = pyaudio.PyAudio()
+
+        return self.audio.open(
+            format=self.FORMAT,
+            channels=self.CHANNELS,
+            rate=self.RATE,
+            input=True,
+            frames_per_buffer=self.CHUNK,
+            input_device_index=None  # 使用默认设备
+        )
+
     def calculate_volume_level(self, data):
         """计算音频数据的音量级别（0-1之间的值）"""
+        import numpy as np
+
         try:
             # 将字节数据转换为numpy数组
             audio_data = np.frombuffer(data, dtype=np.int16).astype(np.float32)
@@ -623,6 +1841,8 @@ class Main(QMainWindow):
 
     def smooth_level(self, level):
         """平滑音频级别，减少跳动"""
+        import numpy as np
+
         self.audio_level_history.append(level)
         if len(self.audio_level_history) > self.history_size:
             self.audio_level_history.pop(0)
@@ -637,13 +1857,14 @@ class Main(QMainWindow):
     def update_volume(self):
         """更新音量显示"""
         try:
-            # 检查音频流是否有效
-            if not self.stream or not self.stream.is_active():
-                logger.error("音频流无效或未激活")
+            # 读取音频数据，流失效时由守护对象在后台重连
+            # 读出缓冲区中的全部数据，保证存档与计分覆盖完整的采集时间
+            data = self.supervisor.read(self.CHUNK, drain=True) if self.supervisor is not None else None
+            if data is None:
+                self.status_bar.showMessage("音频设备已断开，正在重连...")
                 return
-
-            # 读取音频数据
-            data = self.stream.read(self.CHUNK, exception_on_overflow=False)
+            if self.archiver is not None:
+                self.archiver.feed(self.session_timestamp(), data, self.supervisor.generation)
 
             # 计算音量级别
             level, rms = self.calculate_volume_level(data)
@@ -669,48 +1890,43 @@ class Main(QMainWindow):
 
         except Exception as e:
             error_msg = f"更新音量显示时出错: {str(e)}"
-            logger.error(error_msg)
-            traceback.print_exc()
+            self.error_log.log('update_volume', error_msg)
             self.status_bar.showMessage("读取错误 - 请查看控制台")
 
     def update_rating(self):
         if not self.is_recording:
             return
 
+        now = datetime.datetime.now()
+        if self.continuous_mode and self.segment_end_time is not None and now >= self.segment_end_time:
+            self.roll_segment(now)
+
+        if self.supervisor is None or not self.supervisor.connected:
+            # 设备中断：保留得分与连击，时间线上记为中断
+            self.level_history.append_gap()
+            self.rating_label.setText("设备中断")
+            self.rating_label.setStyleSheet("color: #95a5a6;")
+            self.combo_label.setText("")
+            return
+
         level = self.last_level
 
-        rating = ""
-        points = 0
-
-        if level > 95:
-            rating = "CRITICAL PERFECT!"
-            points = 100
-        elif level > 85:
-            rating = "Perfect!"
-            points = 80
-        elif level >= 70:
-            rating = "Great!"
-            points = 50
-        elif level >= 50:
-            rating = "Good"
-            points = 20
-        else:
-            rating = "Miss"
-            points = -20
+        # 查表评级
+        tier_index = self.rules.tier_index(level)
+        tier = self.rules.tiers[tier_index]
+        rating = tier['name']
+        points = tier['points']
 
-            # 更新连击计数
-        if rating in ["Great!", "Perfect!", "CRITICAL PERFECT!"]:
+        # 更新连击计数
+        if tier['combo']:
             self.combo_count += 1
         else:
             # 连击中断，记录连击历史
-            if self.combo_count >= 5:
-                self.combo_history.append(self.combo_count)
-            self.combo_count = 0
+            self.close_combo()
 
         # 计算连击奖励
-        combo_bonus = 0
-        if self.combo_count >= 5:
-            combo_bonus = int(points * (self.combo_count - 4) * 0.1)
+        combo_bonus = self.rules.combo_bonus(points, self.combo_count)
+        if self.combo_count >= self.rules.combo_threshold:
             display_text = f" Combo x{self.combo_count} +{combo_bonus + points}"
         else:
             points_display = f"+{points}" if points > 0 else str(points)
@@ -718,14 +1934,9 @@ class Main(QMainWindow):
 
         self.score += points
 
-        self.rating_history.append({
-            'time': datetime.datetime.now(),
-            'level': level,
-            'rating': rating,
-            'points': points,
-            'combo_bonus': combo_bonus,
-            'combo_count': self.combo_count
-        })
+        # 只记录评级计数与逐秒音量；连续模式下逐秒缓冲区每段复用，内存占用不随运行时长增长
+        self.tier_counts[tier_index] += 1
+        self.level_history.append(level)
 
         # 更新显示
         self.score_label.setText(f"得分: {self.score}")
@@ -733,18 +1944,9 @@ class Main(QMainWindow):
         self.combo_label.setText(display_text)
 
         # 设置Rating的颜色
-        if rating.startswith("CRITICAL"):
-            self.rating_label.setStyleSheet("color: #ffe800; font-weight: bold;")
-        elif rating.startswith("Perfect"):
-            self.rating_label.setStyleSheet("color: #ffa300; font-weight: bold;")
-        elif rating.startswith("Great"):
-            self.rating_label.setStyleSheet("color: #ea1ac1; font-weight: bold;")
-        elif rating.startswith("Good"):
-            self.rating_label.setStyleSheet("color: #5eff00;")
-        else:
-            self.rating_label.setStyleSheet("color: #95a5a6;")
+        self.rating_label.setStyleSheet(tier['style'])
 
-        if rating.startswith('CRITICAL'):
+        if tier_index == 0:
             logger.info(f"{rating.upper()}, 得分变化: {points} + {combo_bonus} , 总得分: {self.score}")
 
     def closeEvent(self, event):
@@ -752,6 +1954,10 @@ class Main(QMainWindow):
         logger.info("正在关闭应用，清理资源...")
         self.save_config()
         try:
+            self.wait_audio_prewarm()
+            # 退出前多等一会，让存档线程写完并补写文件头，否则进程结束后文件无法读取
+            self.stop_archiver(timeout=10)
+
             if hasattr(self, 'timer') and self.timer.isActive():
                 self.timer.stop()
                 logger.info("定时器已停止")
@@ -760,13 +1966,14 @@ class Main(QMainWindow):
                 self.rating_timer.stop()
                 logger.info("评分定时器已停止")
 
-            if hasattr(self, 'stream'):
-                self.stream.stop_stream()
-                self.stream.close()
+            if self.supervisor is not None:
+                self.supervisor.stop()
+                self.supervisor = None
                 logger.info("音频流已关闭")
 
-            if hasattr(self, 'audio'):
+            if self.audio is not None:
                 self.audio.terminate()
+                self.audio = None
                 logger.info("PyAudio已终止")
 
         except Exception as e:
@@ -775,14 +1982,88 @@ class Main(QMainWindow):
         event.accept()
 
 
+def load_rules_file(rules_path=None):
+    """从规则文件加载评级规则，未指定时使用当前配置中的规则，配置不存在则为默认规则"""
+    if rules_path is None:
+        # 未指定规则文件时使用当前配置，配置不存在则为默认规则
+        rules_path = './ClassVoiceMonitor/config.json'
+        if not os.path.exists(rules_path):
+            rules_path = None
+    elif not os.path.exists(rules_path):
+        raise FileNotFoundError(f"规则文件不存在: {rules_path}")
+
+    rules_config = None
+    if rules_path is not None:
+        with open(rules_path, encoding='utf-8') as f:
+            rules_config = json.load(f)
+        # 既可以是完整的 config.json，也可以只包含 rating_rules
+        rules_config = rules_config.get('rating_rules', rules_config)
+    return RatingRules.from_config(rules_config)
+
+
+def rescore_record(raw_path, rules):
+    """用指定规则重算一份已保存的记录，返回 (新报告文本, 逐秒音量)"""
+    with open(raw_path, encoding='utf-8') as f:
+        raw_data = json.load(f)
+    if 'levels' not in raw_data:
+        raise ValueError("该记录未保存逐秒音量，无法重新评分")
+
+    result = rules.rescore(raw_data['levels'])
+    report_data = rules.report_data(raw_data['start_time'], raw_data['end_time'], raw_data['duration'],
+                                    result['score'], result['tier_counts'], result['combo_history'],
+                                    result['gap_seconds'])
+    report_text = (Main.generate_report_text(report_data)
+                   + f"\n原得分: {raw_data.get('total_score')} -> 新规则得分: {result['score']}\n")
+    return report_text, raw_data['levels']
+
+
+def save_rescored_report(raw_path, report_text):
+    """将重算结果保存到原记录旁，records/raw/<ts>.json -> records/raw/<ts>_rescored.txt"""
+    filepath = os.path.splitext(raw_path)[0] + "_rescored.txt"
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(report_text)
+    logger.info(f"重算报告已保存到: {filepath}")
+    return filepath
+
+
 def main():
-    app = QApplication(sys.argv)
+    # python ClassVoiceMonitor.py --rescore records/raw/<ts>.json [rules.json]
+    if '--rescore' in sys.argv:
+        args = sys.argv[sys.argv.index('--rescore') + 1:]
+        if not args:
+            print("用法: ClassVoiceMonitor.py --rescore <raw.json> [rules.json]")
+            sys.exit(2)
+        try:
+            rules = load_rules_file(args[1] if len(args) > 1 else None)
+            report_text, _ = rescore_record(args[0], rules)
+            save_rescored_report(args[0], report_text)
+            print(report_text)
+        except Exception as e:
+            logger.error(f"重新评分失败: {str(e)}")
+            print(f"重新评分失败: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+
+    profiler = StartupProfiler(enabled='--profile-startup' in sys.argv, t0=_STARTUP_T0)
+    profiler.record("导入界面模块", _STARTUP_T0, _STARTUP_IMPORTED)
+
+    with profiler.phase("创建 QApplication"):
+        app = QApplication(sys.argv)
+        app.setStyle('Fusion')
 
-    app.setStyle('Fusion')
+    with profiler.phase("构建主窗口"):
+        window = Main(profiler)
 
-    window = Main()
+    # 窗口先显示，事件循环首次空闲后再开始后台预热音频
+    show_time = time.perf_counter()
     window.show()
 
+    def on_first_idle():
+        profiler.record("显示窗口", show_time, time.perf_counter())
+        window.prewarm_audio()
+
+    QTimer.singleShot(0, on_first_idle)
+
     logger.info("应用启动成功")
 
     sys.exit(app.exec_())
@@ -0,0 +1,223 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ClassVoiceMonitor  # noqa: E402
+from ClassVoiceMonitor import AudioSupervisor, RateLimitedLogger  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeStream:
+    """按需抛出异常的假音频流"""
+
+    def __init__(self):
+        self.fail = False
+        self.closed = False
+
+    def is_active(self):
+        return not self.closed
+
+    def read(self, frames, exception_on_overflow=False):
+        if self.fail:
+            raise OSError("Unanticipated host error")
+        return b'\x00' * 2 * frames
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDevice:
+    """open_stream 的替身：前 failures 次重连失败，记录每次失败时的退避时间"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.opens = []
+        self.backoffs = []
+        self.streams = []
+        self.supervisor = None
+
+    def open_stream(self, reconnect):
+        self.opens.append(reconnect)
+        if reconnect and self.failures > 0:
+            self.failures -= 1
+            self.backoffs.append(self.supervisor.backoff)
+            raise OSError("Invalid input device")
+        stream = FakeStream()
+        self.streams.append(stream)
+        return stream
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.001)
+    return condition()
+
+
+class AudioSupervisorTest(unittest.TestCase):
+    def make_supervisor(self, device, **kwargs):
+        kwargs.setdefault('initial_backoff', 0.001)
+        kwargs.setdefault('max_backoff', 0.004)
+        supervisor = AudioSupervisor(device.open_stream, error_log=RateLimitedLogger(interval=0), **kwargs)
+        device.supervisor = supervisor
+        self.addCleanup(supervisor.stop)
+        return supervisor
+
+    def test_read_returns_data_and_none_on_failure(self):
+        device = FakeDevice(failures=1000)
+        supervisor = self.make_supervisor(device, initial_backoff=30)
+        self.assertTrue(supervisor.start())
+        self.assertEqual(supervisor.read(4), b'\x00' * 8)
+
+        device.streams[0].fail = True
+        self.assertIsNone(supervisor.read(4))
+        self.assertFalse(supervisor.connected)
+        self.assertIsNone(supervisor.read(4))
+
+    def test_reconnects_after_failed_opens(self):
+        device = FakeDevice(failures=3)
+        supervisor = self.make_supervisor(device)
+        supervisor.start()
+        device.streams[0].fail = True
+        supervisor.read(4)
+
+        self.assertTrue(wait_until(lambda: supervisor.connected))
+        self.assertEqual(device.opens, [False, True, True, True, True])
+        self.assertTrue(device.streams[0].closed)
+        self.assertEqual(supervisor.read(2), b'\x00' * 4)
+        self.assertEqual(supervisor.generation, 2)
+
+    def test_backoff_grows_and_is_capped(self):
+        device = FakeDevice(failures=5)
+        supervisor = self.make_supervisor(device)
+        supervisor.start()
+        device.streams[0].fail = True
+        supervisor.read(4)
+
+        self.assertTrue(wait_until(lambda: supervisor.connected))
+        self.assertEqual(device.backoffs, [0.002, 0.004, 0.004, 0.004, 0.004])
+
+    def test_backoff_resets_only_after_healthy_period(self):
+        clock = FakeClock()
+        device = FakeDevice()
+        supervisor = self.make_supervisor(device, healthy_after=10, clock=clock)
+        supervisor.start()
+
+        # 打开后立即失败：退避不重置，继续增长
+        for expected in (0.002, 0.004):
+            device.streams[-1].fail = True
+            supervisor.read(4)
+            self.assertTrue(wait_until(lambda: supervisor.connected))
+            self.assertEqual(supervisor.backoff, expected)
+
+        # 持续正常超过 healthy_after 后失败：退避重置
+        clock.now += 10
+        device.streams[-1].fail = True
+        supervisor.read(4)
+        self.assertTrue(wait_until(lambda: supervisor.connected))
+        self.assertEqual(supervisor.backoff, 0.002)
+
+    def test_failure_right_after_reconnect_is_not_lost(self):
+        device = FakeDevice()
+        supervisor = self.make_supervisor(device)
+        supervisor.start()
+        device.streams[0].fail = True
+
+        def fail_again(message):
+            # 在重连线程 set_stream 之后、退出之前，新的音频流立即失效
+            if len(device.streams) == 2:
+                device.streams[1].fail = True
+                self.assertIsNone(supervisor.read(4))
+
+        with mock.patch.object(ClassVoiceMonitor, 'logger') as logger:
+            logger.info.side_effect = fail_again
+            supervisor.read(4)
+            self.assertTrue(wait_until(lambda: len(device.streams) == 3 and supervisor.connected))
+
+        self.assertEqual(device.opens, [False, True, True])
+        self.assertEqual(supervisor.generation, 3)
+        self.assertTrue(device.streams[1].closed)
+        self.assertTrue(wait_until(lambda: not supervisor.reconnecting))
+
+    def test_stop_during_backoff(self):
+        device = FakeDevice()
+        supervisor = self.make_supervisor(device, initial_backoff=30, max_backoff=60)
+        supervisor.start()
+        device.streams[0].fail = True
+        supervisor.read(4)
+
+        started = time.monotonic()
+        supervisor.stop()
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(device.opens, [False])
+        self.assertFalse(supervisor.connected)
+
+    def test_initial_open_failure_reconnects_in_background(self):
+        device = FakeDevice()
+        fail_first = [True]
+
+        def open_stream(reconnect):
+            if fail_first[0]:
+                fail_first[0] = False
+                raise OSError("No Default Input Device Available")
+            return device.open_stream(reconnect)
+
+        supervisor = AudioSupervisor(open_stream, initial_backoff=0.001, error_log=RateLimitedLogger(interval=0))
+        self.addCleanup(supervisor.stop)
+        self.assertFalse(supervisor.start())
+        self.assertIsNone(supervisor.read(4))
+        self.assertTrue(wait_until(lambda: supervisor.connected))
+        self.assertEqual(device.opens, [True])
+
+
+class RateLimitedLoggerTest(unittest.TestCase):
+    def test_suppresses_and_counts_repeats(self):
+        clock = FakeClock()
+        rate_limited = RateLimitedLogger(interval=10, clock=clock)
+        with mock.patch.object(ClassVoiceMonitor, 'logger') as logger:
+            results = [rate_limited.log('read', "音频流失效") for _ in range(5)]
+            self.assertEqual(results, [True, False, False, False, False])
+            self.assertEqual(logger.log.call_count, 1)
+
+            # 其他类别的消息不受影响
+            self.assertTrue(rate_limited.log('open', "重连失败"))
+
+            clock.now += 10
+            self.assertTrue(rate_limited.log('read', "音频流失效"))
+            self.assertEqual(logger.log.call_count, 3)
+            self.assertIn("另有 4 条", logger.log.call_args[0][1])
+
+            self.assertFalse(rate_limited.log('read', "音频流失效"))
+
+    def test_thread_safe_counts(self):
+        rate_limited = RateLimitedLogger(interval=3600)
+        with mock.patch.object(ClassVoiceMonitor, 'logger') as logger:
+            threads = [threading.Thread(target=lambda: [rate_limited.log('k', "x") for _ in range(100)])
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(logger.log.call_count, 1)
+            self.assertEqual(rate_limited.state['k'][1], 399)
+
+
+if __name__ == '__main__':
+    unittest.main()